@@ -1,18 +1,34 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
+import io
+import csv
 import logging
+import tempfile
 from datetime import datetime
+from functools import lru_cache
 import json
 import traceback
 from werkzeug.utils import secure_filename
+from celery import Celery
+from celery.result import AsyncResult
+from kombu.serialization import register
+import orjson
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+from sqlalchemy import func, insert, select
 
 # Import our enhanced modules
-from utils.data_loader import load_data, generate_sample_data
+from utils.data_loader import load_data, generate_sample_data, prepare_cash_flow_frame
 from utils.optimizer import CashFlowOptimizer
-from utils.projections import AdvancedProjectionEngine
-from models.financial_data import init_database, get_session, FinancialDataset, CashFlowRecord
+from utils.projections import AdvancedProjectionEngine, PROJECTION_LAYOUTS
+from utils._kernels import insights_kernel
+from utils.cache import ResultCache
+from utils.json_provider import OrjsonProvider, orjson_dumps
+from utils.form_parser import UploadRequest
+from models.financial_data import init_database, SessionLocal, FinancialDataset, CashFlowRecord
 from config import config
 
 # Configure logging
@@ -23,6 +39,12 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config.from_object(config['default'])
 
+# Serialize responses with orjson
+app.json = OrjsonProvider(app)
+
+# Parse multipart uploads in large chunks
+app.request_class = UploadRequest
+
 # Enable CORS
 CORS(app)
 
@@ -32,6 +54,88 @@ init_database(app.config['DATABASE_URL'])
 # Create uploads directory
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Memoize projection/optimization results on identical payloads
+cache = ResultCache(app.config['REDIS_URL'], default_ttl=app.config['CACHE_TTL'])
+
+# Engines hold no per-request state, so one instance per configuration is shared
+@lru_cache(maxsize=16)
+def get_projection_engine(horizon):
+    return AdvancedProjectionEngine(forecast_horizon=horizon)
+
+@lru_cache(maxsize=8)
+def get_optimizer(risk_level):
+    return CashFlowOptimizer(risk_level=risk_level)
+
+get_projection_engine(90)
+get_optimizer('moderate')
+
+@cache.cached('projection')
+def run_projection(records, method, horizon, layout='records'):
+    """Generate a liquidity projection for a list of cash flow records"""
+    return get_projection_engine(horizon).generate_liquidity_projection(records, method, layout)
+
+@cache.cached('optimization')
+def run_optimization(records, strategy, risk_level):
+    """Optimize cash flow for a list of cash flow records"""
+    return get_optimizer(risk_level).optimize_cash_flow(records, strategy)
+
+@cache.cached('analysis')
+def run_analysis(records, projection_method, optimization_strategy, risk_level, horizon):
+    """Combine a projection and an optimization into one analysis"""
+    # Parse the payload once and hand the same frame to both engines
+    df = prepare_cash_flow_frame(records)
+    return {
+        'projection': get_projection_engine(horizon).generate_liquidity_projection(df, projection_method),
+        'optimization': get_optimizer(risk_level).optimize_cash_flow(df, optimization_strategy),
+        'summary': {
+            'total_records': len(records),
+            'projection_horizon': horizon,
+            'risk_level': risk_level,
+            'strategy': optimization_strategy,
+            'method': projection_method
+        }
+    }
+
+# Background task queue on the configured Redis
+# Run workers with: celery -A app.celery worker --concurrency=<MAX_WORKERS>
+# Results carry numpy scalars, so tasks use the same orjson serialization as responses
+register('orjson', orjson_dumps, orjson.loads,
+         content_type='application/x-orjson', content_encoding='binary')
+celery = Celery('sageorb', broker=app.config['REDIS_URL'], backend=app.config['REDIS_URL'])
+celery.conf.update(
+    task_serializer='orjson',
+    result_serializer='orjson',
+    accept_content=['orjson'],
+    worker_concurrency=app.config['MAX_WORKERS'],
+    result_expires=app.config['TASK_RESULT_TTL']
+)
+
+@celery.task(name='sageorb.projection')
+def projection_task(records, method, horizon, layout='records'):
+    return run_projection(records, method, horizon, layout)
+
+@celery.task(name='sageorb.optimization')
+def optimization_task(records, strategy, risk_level):
+    return run_optimization(records, strategy, risk_level)
+
+@celery.task(name='sageorb.analysis')
+def analysis_task(records, projection_method, optimization_strategy, risk_level, horizon):
+    return run_analysis(records, projection_method, optimization_strategy, risk_level, horizon)
+
+def submit_task(task, *args):
+    """Queue a background task and return its id for polling"""
+    result = task.delay(*args)
+    return jsonify({
+        'success': True,
+        'task_id': result.id,
+        'status_url': f'/api/v1/tasks/{result.id}'
+    }), 202
+
+@app.teardown_appcontext
+def remove_session(exception=None):
+    """Release the thread-local database session at the end of each request"""
+    SessionLocal.remove()
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
@@ -69,54 +173,55 @@ def upload_data():
                 'error': f'File type not allowed. Allowed types: {list(app.config["ALLOWED_EXTENSIONS"])}'
             }), 400
         
-        # Load and process data
-        result = load_data(file, validate=True, preprocess=True)
-        
-        if not result['success']:
-            return jsonify(result), 400
-        
-        # Save file
+        # Save file once to a temporary path, then parse it from disk; it only
+        # replaces a stored upload of the same name once it has loaded cleanly
         filename = secure_filename(file.filename)
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        
-        # Store in database
-        session = get_session(app.config['DATABASE_URL'])
+        fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1], dir=app.config['UPLOAD_FOLDER'])
         try:
-            dataset = FinancialDataset(
-                name=filename,
-                description=request.form.get('description', ''),
-                file_path=file_path,
-                metadata=json.dumps(result['metadata'])
-            )
-            session.add(dataset)
-            session.commit()
+            with os.fdopen(fd, 'wb') as temp_file:
+                file.save(temp_file)
             
-            # Store cash flow records
-            for record in result['data']:
-                cash_record = CashFlowRecord(
-                    dataset_id=dataset.id,
-                    date=datetime.strptime(record['date'], '%Y-%m-%d'),
-                    cash_in=record['cash_in'],
-                    cash_out=record['cash_out'],
-                    category=record.get('category'),
-                    description=record.get('description')
-                )
-                session.add(cash_record)
-            
-            session.commit()
+            # Load and process data
+            result = load_data(temp_path, validate=True, preprocess=True)
             
-            result['dataset_id'] = dataset.id
+            if not result['success']:
+                return jsonify(result), 400
             
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Database error: {str(e)}")
-            return jsonify({
-                'success': False,
-                'error': 'Failed to save data to database'
-            }), 500
+            os.replace(temp_path, file_path)
         finally:
-            session.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        # Store in database
+        with SessionLocal() as session:
+            try:
+                dataset = FinancialDataset(
+                    name=filename,
+                    description=request.form.get('description', ''),
+                    file_path=file_path,
+                    extra_metadata=orjson_dumps(result['metadata']).decode()
+                )
+                session.add(dataset)
+                session.flush()
+
+                # Store cash flow records in executemany batches
+                mappings = _build_cash_flow_mappings(dataset.id, result['data'])
+                batch_size = app.config['BULK_INSERT_BATCH_SIZE']
+                for start in range(0, len(mappings), batch_size):
+                    session.execute(insert(CashFlowRecord), mappings[start:start + batch_size])
+
+                session.commit()
+            
+                result['dataset_id'] = dataset.id
+            
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Database error: {str(e)}")
+                return jsonify({
+                    'success': False,
+                    'error': 'Failed to save data to database'
+                }), 500
         
         return jsonify(result)
         
@@ -173,6 +278,7 @@ def liquidity_projection():
         # Get projection parameters
         method = data.get('method', 'ensemble')
         horizon = data.get('horizon', 90)
+        layout = data.get('layout', 'records')
         
         # Validate method
         valid_methods = ['simple', 'advanced', 'ensemble', 'ml']
@@ -182,9 +288,17 @@ def liquidity_projection():
                 'error': f'Invalid method. Valid methods: {valid_methods}'
             }), 400
         
+        if layout not in PROJECTION_LAYOUTS:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid layout. Valid layouts: {list(PROJECTION_LAYOUTS)}'
+            }), 400
+        
+        if data.get('async'):
+            return submit_task(projection_task, data['data'], method, horizon, layout)
+        
         # Generate projection
-        engine = AdvancedProjectionEngine(forecast_horizon=horizon)
-        projection = engine.generate_liquidity_projection(data['data'], method)
+        projection = run_projection(data['data'], method, horizon, layout)
         
         return jsonify({
             'success': True,
@@ -230,9 +344,11 @@ def optimize():
                 'error': f'Invalid risk level. Valid levels: {valid_risk_levels}'
             }), 400
         
+        if data.get('async'):
+            return submit_task(optimization_task, data['data'], strategy, risk_level)
+        
         # Perform optimization
-        optimizer = CashFlowOptimizer(risk_level=risk_level)
-        optimization_result = optimizer.optimize_cash_flow(data['data'], strategy)
+        optimization_result = run_optimization(data['data'], strategy, risk_level)
         
         return jsonify({
             'success': True,
@@ -264,26 +380,12 @@ def analyze():
         risk_level = data.get('risk_level', 'moderate')
         horizon = data.get('horizon', 90)
         
-        # Generate projection
-        engine = AdvancedProjectionEngine(forecast_horizon=horizon)
-        projection = engine.generate_liquidity_projection(data['data'], projection_method)
+        args = (data['data'], projection_method, optimization_strategy, risk_level, horizon)
+        if data.get('async'):
+            return submit_task(analysis_task, *args)
         
-        # Perform optimization
-        optimizer = CashFlowOptimizer(risk_level=risk_level)
-        optimization = optimizer.optimize_cash_flow(data['data'], optimization_strategy)
-        
-        # Combine results
-        analysis = {
-            'projection': projection,
-            'optimization': optimization,
-            'summary': {
-                'total_records': len(data['data']),
-                'projection_horizon': horizon,
-                'risk_level': risk_level,
-                'strategy': optimization_strategy,
-                'method': projection_method
-            }
-        }
+        # Generate projection and optimization
+        analysis = run_analysis(*args)
         
         return jsonify({
             'success': True,
@@ -297,16 +399,79 @@ def analyze():
             'error': 'Failed to perform analysis'
         }), 500
 
-@app.route('/api/v1/datasets', methods=['GET'])
-def list_datasets():
-    """List all uploaded datasets"""
+@app.route('/api/v1/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    """Poll the state of a background projection/optimization/analysis task"""
     try:
-        session = get_session(app.config['DATABASE_URL'])
-        datasets = session.query(FinancialDataset).all()
+        result = AsyncResult(task_id, app=celery)
+        response = {
+            'success': True,
+            'task_id': task_id,
+            'state': result.state
+        }
         
-        result = [dataset.to_dict() for dataset in datasets]
+        if result.successful():
+            response['result'] = result.result
+        elif result.failed():
+            response['success'] = False
+            response['error'] = 'Task failed'
         
-        session.close()
+        return jsonify(response)
+        
+    except Exception as e:
+        logger.error(f"Task status error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to retrieve task status'
+        }), 500
+
+DATASET_SUMMARY_COLUMNS = (
+    FinancialDataset.id,
+    FinancialDataset.name,
+    FinancialDataset.description,
+    FinancialDataset.created_at,
+    FinancialDataset.updated_at,
+    FinancialDataset.extra_metadata
+)
+
+CASH_FLOW_COLUMNS = (
+    CashFlowRecord.id,
+    CashFlowRecord.dataset_id,
+    CashFlowRecord.date,
+    CashFlowRecord.cash_in,
+    CashFlowRecord.cash_out,
+    CashFlowRecord.net_cash_flow,
+    CashFlowRecord.category,
+    CashFlowRecord.description
+)
+
+def _dataset_summary(row):
+    """Build the dataset payload from a projected row"""
+    return {
+        'id': row.id,
+        'name': row.name,
+        'description': row.description,
+        'created_at': row.created_at,
+        'updated_at': row.updated_at,
+        'metadata': orjson.loads(row.extra_metadata) if row.extra_metadata else {}
+    }
+
+@app.route('/api/v1/datasets', methods=['GET'])
+def list_datasets():
+    """List uploaded datasets, newest first, paginated with ?limit=&offset="""
+    try:
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        # Project only the columns the listing needs; skips ORM hydration and file_path
+        query = (
+            select(*DATASET_SUMMARY_COLUMNS)
+            .order_by(FinancialDataset.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        with SessionLocal() as session:
+            result = [_dataset_summary(row) for row in session.execute(query)]
         
         return jsonify({
             'success': True,
@@ -322,28 +487,48 @@ def list_datasets():
 
 @app.route('/api/v1/datasets/<int:dataset_id>', methods=['GET'])
 def get_dataset(dataset_id):
-    """Get specific dataset with cash flow records"""
+    """Get specific dataset with cash flow records (?format=arrow for an Arrow IPC stream)"""
     try:
-        session = get_session(app.config['DATABASE_URL'])
-        dataset = session.query(FinancialDataset).filter_by(id=dataset_id).first()
-        
-        if not dataset:
+        response_format = request.args.get('format', 'json')
+        if response_format not in ('json', 'arrow'):
             return jsonify({
                 'success': False,
-                'error': 'Dataset not found'
-            }), 404
-        
-        # Get cash flow records
-        records = session.query(CashFlowRecord).filter_by(dataset_id=dataset_id).all()
-        cash_flow_data = [record.to_dict() for record in records]
-        
-        session.close()
+                'error': 'Unsupported format. Supported formats: json, arrow'
+            }), 400
         
-        return jsonify({
-            'success': True,
-            'dataset': dataset.to_dict(),
-            'cash_flow_data': cash_flow_data
-        })
+        with SessionLocal() as session:
+            row = session.execute(
+                select(*DATASET_SUMMARY_COLUMNS, FinancialDataset.file_path)
+                .where(FinancialDataset.id == dataset_id)
+            ).first()
+            
+            if not row:
+                return jsonify({
+                    'success': False,
+                    'error': 'Dataset not found'
+                }), 404
+            
+            dataset = _dataset_summary(row)
+            dataset['file_path'] = row.file_path
+            
+            query = (
+                select(*CASH_FLOW_COLUMNS)
+                .where(CashFlowRecord.dataset_id == dataset_id)
+                .order_by(CashFlowRecord.date)
+            )
+            
+            if response_format == 'arrow':
+                return _arrow_response(session, query, dataset)
+            
+            # Get cash flow records as plain row mappings
+            records = session.execute(query).mappings()
+            cash_flow_data = [dict(record) for record in records]
+            
+            return jsonify({
+                'success': True,
+                'dataset': dataset,
+                'cash_flow_data': cash_flow_data
+            })
         
     except Exception as e:
         logger.error(f"Dataset retrieval error: {str(e)}")
@@ -356,38 +541,49 @@ def get_dataset(dataset_id):
 def export_dataset(dataset_id):
     """Export dataset as CSV"""
     try:
-        session = get_session(app.config['DATABASE_URL'])
-        dataset = session.query(FinancialDataset).filter_by(id=dataset_id).first()
-        
-        if not dataset:
-            return jsonify({
-                'success': False,
-                'error': 'Dataset not found'
-            }), 404
-        
-        # Get cash flow records
-        records = session.query(CashFlowRecord).filter_by(dataset_id=dataset_id).all()
-        
-        # Convert to DataFrame
-        data = []
-        for record in records:
-            data.append({
-                'date': record.date.strftime('%Y-%m-%d'),
-                'cash_in': record.cash_in,
-                'cash_out': record.cash_out,
-                'category': record.category,
-                'description': record.description
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Create temporary file
-        export_path = os.path.join(app.config['UPLOAD_FOLDER'], f'export_{dataset_id}.csv')
-        df.to_csv(export_path, index=False)
-        
-        session.close()
-        
-        return send_file(export_path, as_attachment=True, download_name=f'{dataset.name}_export.csv')
+        with SessionLocal() as session:
+            dataset = session.query(FinancialDataset).filter_by(id=dataset_id).first()
+            
+            if not dataset:
+                return jsonify({
+                    'success': False,
+                    'error': 'Dataset not found'
+                }), 404
+            
+            download_name = secure_filename(f'{dataset.name}_export.csv')
+        
+        query = select(
+            CashFlowRecord.date,
+            CashFlowRecord.cash_in,
+            CashFlowRecord.cash_out,
+            CashFlowRecord.category,
+            CashFlowRecord.description
+        ).where(CashFlowRecord.dataset_id == dataset_id)
+        batch_size = app.config['EXPORT_BATCH_SIZE']
+        
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(['date', 'cash_in', 'cash_out', 'category', 'description'])
+            yield buffer.getvalue()
+            
+            # Stream rows from a server-side cursor, one CSV chunk per partition
+            with SessionLocal() as session:
+                rows = session.execute(query.execution_options(yield_per=batch_size))
+                for partition in rows.partitions():
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(
+                        (row.date.strftime('%Y-%m-%d'), row.cash_in, row.cash_out, row.category, row.description)
+                        for row in partition
+                    )
+                    yield buffer.getvalue()
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+        )
         
     except Exception as e:
         logger.error(f"Export error: {str(e)}")
@@ -402,36 +598,61 @@ def generate_insights():
     try:
         data = request.json
         
-        if not data or 'data' not in data:
+        if not data or ('data' not in data and 'dataset_id' not in data):
             return jsonify({
                 'success': False,
                 'error': 'No data provided'
             }), 400
         
-        df = pd.DataFrame(data['data'])
-        df['date'] = pd.to_datetime(df['date'])
-        df['net_cash_flow'] = df['cash_in'] - df['cash_out']
+        if 'dataset_id' in data:
+            # Aggregate a stored dataset in SQL, pulling only the net flow column
+            dataset_filter = CashFlowRecord.dataset_id == data['dataset_id']
+            with SessionLocal() as session:
+                total_cash_in, total_cash_out = session.query(
+                    func.sum(CashFlowRecord.cash_in), func.sum(CashFlowRecord.cash_out)
+                ).filter(dataset_filter).one()
+                net_cash_flow = np.fromiter(
+                    session.execute(
+                        select(CashFlowRecord.net_cash_flow).where(dataset_filter).order_by(CashFlowRecord.date)
+                    ).scalars(),
+                    dtype=np.float64
+                )
+            
+            if net_cash_flow.size == 0:
+                return jsonify({
+                    'success': False,
+                    'error': 'Dataset not found'
+                }), 404
+        else:
+            df = pd.DataFrame(data['data'])
+            total_cash_in = df['cash_in'].sum()
+            total_cash_out = df['cash_out'].sum()
+            net_cash_flow = (df['cash_in'] - df['cash_out']).to_numpy(dtype=np.float64)
+        
+        # One compiled sweep (plus a centred pass) over the net cash flow buffer for all scalar statistics
+        (net_total, net_mean, net_std, negative_days, first_flow, last_flow,
+         recent_mean, trend_corr, max_drawdown) = insights_kernel(net_cash_flow)
         
         # Calculate insights
         insights = {
             'cash_flow_summary': {
-                'total_cash_in': float(df['cash_in'].sum()),
-                'total_cash_out': float(df['cash_out'].sum()),
-                'net_cash_flow': float(df['net_cash_flow'].sum()),
-                'avg_daily_cash_flow': float(df['net_cash_flow'].mean()),
-                'cash_flow_volatility': float(df['net_cash_flow'].std())
+                'total_cash_in': float(total_cash_in),
+                'total_cash_out': float(total_cash_out),
+                'net_cash_flow': float(net_total),
+                'avg_daily_cash_flow': float(net_mean),
+                'cash_flow_volatility': float(net_std)
             },
             'trends': {
-                'trend_direction': 'increasing' if df['net_cash_flow'].iloc[-1] > df['net_cash_flow'].iloc[0] else 'decreasing',
-                'trend_strength': float(abs(df['net_cash_flow'].corr(pd.Series(range(len(df)))))),
-                'seasonality_detected': _detect_seasonality(df)
+                'trend_direction': 'increasing' if last_flow > first_flow else 'decreasing',
+                'trend_strength': float(abs(trend_corr)),
+                'seasonality_detected': _detect_seasonality(net_cash_flow)
             },
             'risk_indicators': {
-                'negative_cash_flow_days': int(len(df[df['net_cash_flow'] < 0])),
-                'cash_flow_volatility_ratio': float(df['net_cash_flow'].std() / abs(df['net_cash_flow'].mean())) if df['net_cash_flow'].mean() != 0 else 0,
-                'max_drawdown': float(_calculate_max_drawdown(df))
+                'negative_cash_flow_days': int(negative_days),
+                'cash_flow_volatility_ratio': float(net_std / abs(net_mean)) if net_mean != 0 else 0,
+                'max_drawdown': float(max_drawdown)
             },
-            'recommendations': _generate_insights_recommendations(df)
+            'recommendations': _generate_insights_recommendations(net_cash_flow.size, net_mean, net_std, recent_mean)
         }
         
         return jsonify({
@@ -446,29 +667,71 @@ def generate_insights():
             'error': 'Failed to generate insights'
         }), 500
 
-def _detect_seasonality(df):
+def _build_cash_flow_mappings(dataset_id, columns):
+    """Build CashFlowRecord insert parameters from the columnar upload payload"""
+    df = pd.DataFrame(columns)
+    # Parse once in C (memoizing repeated dates) and hand SQLAlchemy plain datetimes
+    dates = pd.to_datetime(df['date'].to_numpy(), format='%Y-%m-%d', cache=True).to_pydatetime()
+    net_cash_flow = (df['cash_in'] - df['cash_out']).tolist()
+
+    optional = {}
+    for col in ['category', 'description']:
+        if col in df.columns:
+            optional[col] = df[col].astype(object).where(df[col].notna(), None).tolist()
+        else:
+            optional[col] = [None] * len(df)
+
+    return [
+        {
+            'dataset_id': dataset_id,
+            'date': date,
+            'cash_in': cash_in,
+            'cash_out': cash_out,
+            'net_cash_flow': net,
+            'category': category,
+            'description': description
+        }
+        for date, cash_in, cash_out, net, category, description in zip(
+            dates, df['cash_in'].tolist(), df['cash_out'].tolist(), net_cash_flow,
+            optional['category'], optional['description']
+        )
+    ]
+
+def _arrow_response(session, query, dataset):
+    """Return query rows as a columnar Arrow IPC stream, with the dataset in the schema metadata"""
+    frame = pd.read_sql_query(query, session.connection())
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.replace_schema_metadata({'dataset': orjson_dumps(dataset)})
+    
+    sink = io.BytesIO()
+    with ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    
+    return Response(sink.getvalue(), mimetype='application/vnd.apache.arrow.stream')
+
+def _detect_seasonality(net_cash_flow, max_lag=30):
     """Detect seasonality in cash flow data"""
-    # Simple seasonality detection using autocorrelation
-    net_cash_flow = df['net_cash_flow']
-    autocorr = [net_cash_flow.autocorr(lag=i) for i in range(1, 31)]
-    max_autocorr = max(autocorr) if autocorr else 0
-    return max_autocorr > 0.3
-
-def _calculate_max_drawdown(df):
-    """Calculate maximum drawdown"""
-    cumulative = df['net_cash_flow'].cumsum()
-    running_max = cumulative.expanding().max()
-    drawdown = (cumulative - running_max) / running_max
-    return drawdown.min()
-
-def _generate_insights_recommendations(df):
+    # Autocorrelation for lags 1..max_lag from a single FFT
+    x = np.asarray(net_cash_flow, dtype=np.float64)
+    n = x.size
+    max_lag = min(max_lag, n - 1)
+    if max_lag < 1:
+        return False
+    
+    x = x - x.mean()
+    variance = x.var()
+    if variance == 0:
+        return False
+    
+    spectrum = np.fft.rfft(x, n=2 * n)
+    autocov = np.fft.irfft(spectrum * np.conj(spectrum), n=2 * n)[:max_lag + 1]
+    autocorr = autocov / (np.arange(n, n - max_lag - 1, -1) * variance)
+    return bool(autocorr[1:].max() > 0.3)
+
+def _generate_insights_recommendations(n_records, avg_cash_flow, volatility, recent_avg):
     """Generate business recommendations based on data"""
     recommendations = []
     
-    net_cash_flow = df['net_cash_flow']
-    avg_cash_flow = net_cash_flow.mean()
-    volatility = net_cash_flow.std()
-    
     # Cash flow recommendations
     if avg_cash_flow < 0:
         recommendations.append("Negative average cash flow detected - review expenses and revenue streams")
@@ -477,8 +740,7 @@ def _generate_insights_recommendations(df):
         recommendations.append("High cash flow volatility - consider implementing cash flow smoothing strategies")
     
     # Trend recommendations
-    if len(df) > 30:
-        recent_avg = net_cash_flow.tail(30).mean()
+    if n_records > 30:
         if recent_avg > avg_cash_flow * 1.2:
             recommendations.append("Improving cash flow trend - consider investment opportunities")
         elif recent_avg < avg_cash_flow * 0.8:
@@ -12,6 +12,7 @@ class Config:
     
     # Redis for caching and task queue
     REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    TASK_RESULT_TTL = 3600  # seconds background task results are kept
     
     # API Configuration
     API_TITLE = "SageOrb API"
@@ -35,6 +36,8 @@ class Config:
     # Performance settings
     CACHE_TTL = 300  # 5 minutes
     MAX_WORKERS = 4
+    BULK_INSERT_BATCH_SIZE = 10000  # rows per executemany batch
+    EXPORT_BATCH_SIZE = 10000  # rows per streamed CSV chunk
     REQUEST_TIMEOUT = 30
 
 class DevelopmentConfig(Config):
@@ -0,0 +1,11 @@
+from config import Config
+
+# Production entrypoint: gunicorn -c gunicorn.conf.py wsgi:app
+bind = '0.0.0.0:5000'
+workers = Config.MAX_WORKERS
+worker_class = 'gevent'
+worker_connections = 1000
+timeout = Config.REQUEST_TIMEOUT
+keepalive = 5
+accesslog = '-'
+errorlog = '-'
@@ -1,10 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import create_engine, event, inspect, text, Column, ForeignKey, Index, Integer, String, Float, DateTime, Text, Boolean
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
 from datetime import datetime
+from functools import lru_cache
 import pandas as pd
 from typing import Dict, List, Optional
-import json
+import orjson
 
 Base = declarative_base()
 
@@ -17,7 +19,7 @@ class FinancialDataset(Base):
     file_path = Column(String(500), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    metadata = Column(Text)  # JSON string for additional metadata
+    extra_metadata = Column('metadata', Text)  # JSON string; `metadata` is reserved on declarative classes
     
     def to_dict(self):
         return {
@@ -25,19 +27,23 @@ class FinancialDataset(Base):
             'name': self.name,
             'description': self.description,
             'file_path': self.file_path,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'metadata': json.loads(self.metadata) if self.metadata else {}
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'metadata': orjson.loads(self.extra_metadata) if self.extra_metadata else {}
         }
 
 class CashFlowRecord(Base):
     __tablename__ = 'cash_flow_records'
+    __table_args__ = (
+        Index('ix_cfr_dataset_date', 'dataset_id', 'date'),
+    )
     
     id = Column(Integer, primary_key=True)
-    dataset_id = Column(Integer, nullable=False)
+    dataset_id = Column(Integer, ForeignKey('financial_datasets.id', ondelete='CASCADE'), nullable=False)
     date = Column(DateTime, nullable=False)
     cash_in = Column(Float, nullable=False, default=0.0)
     cash_out = Column(Float, nullable=False, default=0.0)
+    net_cash_flow = Column(Float, nullable=False, default=0.0)  # cash_in - cash_out, set at ingest
     category = Column(String(100))
     description = Column(Text)
     
@@ -45,9 +51,10 @@ class CashFlowRecord(Base):
         return {
             'id': self.id,
             'dataset_id': self.dataset_id,
-            'date': self.date.isoformat(),
+            'date': self.date,
             'cash_in': self.cash_in,
             'cash_out': self.cash_out,
+            'net_cash_flow': self.net_cash_flow,
             'category': self.category,
             'description': self.description
         }
@@ -69,9 +76,9 @@ class OptimizationResult(Base):
             'dataset_id': self.dataset_id,
             'strategy_name': self.strategy_name,
             'risk_level': self.risk_level,
-            'parameters': json.loads(self.parameters) if self.parameters else {},
-            'results': json.loads(self.results) if self.results else {},
-            'created_at': self.created_at.isoformat()
+            'parameters': orjson.loads(self.parameters) if self.parameters else {},
+            'results': orjson.loads(self.results) if self.results else {},
+            'created_at': self.created_at
         }
 
 class PredictionModel(Base):
@@ -93,20 +100,57 @@ class PredictionModel(Base):
             'model_type': self.model_type,
             'model_path': self.model_path,
             'accuracy_score': self.accuracy_score,
-            'parameters': json.loads(self.parameters) if self.parameters else {},
-            'created_at': self.created_at.isoformat(),
+            'parameters': orjson.loads(self.parameters) if self.parameters else {},
+            'created_at': self.created_at,
             'is_active': self.is_active
         }
 
 # Database connection
+SessionLocal = scoped_session(sessionmaker())
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL journaling for faster bulk writes, and enforced foreign keys"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+@lru_cache(maxsize=4)
 def get_database_engine(database_url: str):
-    return create_engine(database_url)
+    """Create one pooled engine per database URL and reuse it"""
+    is_sqlite = make_url(database_url).get_backend_name() == 'sqlite'
+    options = {'pool_pre_ping': True, 'pool_recycle': 1800, 'insertmanyvalues_page_size': 10000}
+    if not is_sqlite:
+        options.update(pool_size=10, max_overflow=20)
+    engine = create_engine(database_url, **options)
+    
+    if is_sqlite:
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    
+    return engine
 
 def get_session(database_url: str):
-    engine = get_database_engine(database_url)
-    Session = sessionmaker(bind=engine)
-    return Session()
+    return Session(bind=get_database_engine(database_url))
+
+def _migrate(engine):
+    """Add columns and indexes introduced after a table was first created"""
+    inspector = inspect(engine)
+    columns = {col['name'] for col in inspector.get_columns('cash_flow_records')}
+    
+    if 'net_cash_flow' not in columns:
+        with engine.begin() as conn:
+            conn.execute(text(
+                'ALTER TABLE cash_flow_records ADD COLUMN net_cash_flow FLOAT NOT NULL DEFAULT 0'
+            ))
+            conn.execute(text('UPDATE cash_flow_records SET net_cash_flow = cash_in - cash_out'))
+    
+    # Indexes declared after the table was created are not added by create_all
+    for index in CashFlowRecord.__table__.indexes:
+        index.create(engine, checkfirst=True)
 
 def init_database(database_url: str):
     engine = get_database_engine(database_url)
     Base.metadata.create_all(engine)
+    _migrate(engine)
+    SessionLocal.configure(bind=engine)
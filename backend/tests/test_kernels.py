@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils._kernels import (
+    ML_LAGS, ML_WINDOWS, insights_kernel, ml_window_features, projection_window_features,
+    risk_kernel
+)
+
+
+def _cash_flows(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    cash_in = rng.normal(50_000, 8_000, n)
+    cash_out = rng.normal(45_000, 9_000, n)
+    cash_in[60] = np.nan
+    return cash_in, cash_out, cash_in - cash_out
+
+
+def test_ml_window_features_match_pandas_around_a_missing_amount():
+    cash_in, cash_out, net = _cash_flows()
+    features = ml_window_features(cash_in, cash_out, net)
+
+    row = 3 * len(ML_LAGS)
+    for w in ML_WINDOWS:
+        expected = [
+            pd.Series(cash_in).rolling(w).mean(),
+            pd.Series(cash_out).rolling(w).mean(),
+            pd.Series(net).rolling(w).mean(),
+            pd.Series(net).rolling(w).std(),
+        ]
+        for offset, series in enumerate(expected):
+            np.testing.assert_allclose(features[row + offset], series.to_numpy(), rtol=1e-9)
+        row += 4
+
+    # Windows past the missing value are filled again
+    assert not np.isnan(features[-4:, 60 + max(ML_WINDOWS)]).any()
+
+
+def test_projection_window_features_match_pandas_around_a_missing_amount():
+    cash_in, cash_out, net = _cash_flows()
+    features = projection_window_features(cash_in, cash_out, net)
+
+    row = 0
+    for w in ML_WINDOWS:
+        expected = [
+            pd.Series(cash_in).rolling(w).mean(),
+            pd.Series(cash_out).rolling(w).mean(),
+            pd.Series(net).rolling(w).mean(),
+            pd.Series(net).rolling(w).std(),
+            pd.Series(net).rolling(w).min(),
+            pd.Series(net).rolling(w).max(),
+        ]
+        for offset, series in enumerate(expected):
+            np.testing.assert_allclose(features[row + offset], series.to_numpy(), rtol=1e-9)
+        row += 6
+
+    assert not np.isnan(features[-6:, 60 + max(ML_WINDOWS)]).any()
+
+
+def test_insights_kernel_spread_and_trend_at_cash_magnitudes():
+    x = 1e9 + np.random.default_rng(1).normal(0, 1_000, 365) + np.arange(365)
+    _, mean, std, _, _, _, _, trend_corr, _ = insights_kernel(x)
+
+    assert mean == pytest.approx(x.mean(), rel=1e-12)
+    assert std == pytest.approx(x.std(ddof=1), rel=1e-9)
+    assert trend_corr == pytest.approx(np.corrcoef(x, np.arange(365))[0, 1], rel=1e-9)
+
+
+def test_insights_kernel_measures_drawdown_against_positive_peaks_only():
+    # The balance peaks at 100 and falls to 40; the earlier dip below zero has no peak to fall from
+    x = np.array([-50.0, -20.0, 170.0, -30.0, -30.0, 20.0])
+    assert insights_kernel(x)[-1] == pytest.approx(-0.6)
+    assert insights_kernel(np.array([-10.0, -5.0, 3.0]))[-1] == 0.0
+
+
+def test_risk_kernel_volatility_matches_pandas_around_a_missing_amount():
+    _, _, net = _cash_flows()
+    *_, avg_volatility, volatility_trend = risk_kernel(net, np.cumsum(net), 30)
+
+    rolling_vol = pd.Series(net).rolling(30).std().dropna()
+    assert avg_volatility == pytest.approx(rolling_vol.mean(), rel=1e-9)
+    assert volatility_trend == pytest.approx(rolling_vol.iloc[-1] - rolling_vol.iloc[0], rel=1e-9)
+
+
+def test_risk_kernel_tail_metrics_ignore_a_missing_amount():
+    _, _, net = _cash_flows()
+    var_95, var_99, cvar_95, cvar_99, *_ = risk_kernel(net, np.cumsum(net), 30)
+
+    assert var_95 == pytest.approx(np.nanpercentile(net, 5), rel=1e-9)
+    assert var_99 == pytest.approx(np.nanpercentile(net, 1), rel=1e-9)
+    assert cvar_95 == pytest.approx(net[net <= var_95].mean(), rel=1e-9)
+    assert cvar_99 == pytest.approx(net[net <= var_99].mean(), rel=1e-9)
+    assert cvar_99 <= var_99 <= var_95 and cvar_95 <= var_95
@@ -0,0 +1,497 @@
+import numpy as np
+from numba import njit, types
+
+# Allow reassociation so reductions vectorize, but keep IEEE NaN/inf semantics
+FASTMATH = {'reassoc', 'contract'}
+
+# Kernels declare explicit signatures, so they are compiled (or loaded from the
+# on-disk cache) eagerly at import and the first request never pays for JIT.
+# Inputs are typed read-only (writable arrays still match) because copy-on-write
+# pandas hands out read-only views.
+f8 = types.float64
+i8 = types.int64
+INPUT = types.Array(f8, 1, 'A', readonly=True)
+
+@njit(types.UniTuple(f8, 2)(INPUT, f8), cache=True, fastmath=FASTMATH)
+def _centred_moments(x, mean):
+    """
+    Sum of squared deviations of x and its co-deviation with the index 0..n-1
+
+    Both are taken around the means, so large cash magnitudes do not cancel
+    as they would in sum-of-squares formulas.
+    """
+    mean_i = (x.size - 1) / 2.0
+    ss_x = 0.0
+    cov = 0.0
+    for i in range(x.size):
+        d = x[i] - mean
+        ss_x += d * d
+        cov += (i - mean_i) * d
+    return ss_x, cov
+
+@njit(f8(i8, f8, f8), cache=True, fastmath=FASTMATH)
+def _index_corr(n, ss_x, cov):
+    """Pearson correlation with the index 0..n-1 from _centred_moments"""
+    if n < 2 or ss_x <= 0:
+        return np.nan
+    ss_i = n * (n * n - 1.0) / 12.0
+    return cov / np.sqrt(ss_i * ss_x)
+
+@njit(f8(INPUT), cache=True, fastmath=FASTMATH)
+def trend_corr_kernel(x):
+    """Pearson correlation of a series with its natural index"""
+    n = x.size
+    if n == 0:
+        return np.nan
+    ss_x, cov = _centred_moments(x, x.sum() / n)
+    return _index_corr(n, ss_x, cov)
+
+@njit(types.UniTuple(f8, 2)(INPUT), cache=True, fastmath=FASTMATH)
+def linear_fit_kernel(x):
+    """
+    Least-squares (slope, intercept) of a series against its index 0..n-1
+
+    Same fit as np.polyfit(np.arange(n), x, 1) using the closed-form index
+    moments; the slope is 0 for fewer than two values.
+    """
+    n = x.size
+    if n == 0:
+        return np.nan, np.nan
+
+    mean_i = (n - 1) / 2.0
+    mean_x = 0.0
+    for i in range(n):
+        mean_x += x[i]
+    mean_x /= n
+    if n < 2:
+        return 0.0, mean_x
+
+    # Centred on the index mean so large cash magnitudes do not cancel
+    cov = 0.0
+    for i in range(n):
+        cov += (i - mean_i) * x[i]
+    ss_i = n * (n * n - 1.0) / 12.0
+    slope = cov / ss_i
+    return slope, mean_x - slope * mean_i
+
+@njit(types.UniTuple(f8[:], 3)(INPUT), cache=True, fastmath=FASTMATH)
+def decompose_kernel(x):
+    """
+    (trend, seasonal, residual) of a series around its linear trend
+
+    The first week carries no seasonal component, so its deviation from the
+    trend is left in the residual.
+    """
+    n = x.size
+    trend = np.empty(n)
+    seasonal = np.zeros(n)
+    residual = np.zeros(n)
+
+    slope, intercept = linear_fit_kernel(x)
+    for i in range(n):
+        trend[i] = slope * i + intercept
+        deviation = x[i] - trend[i]
+        if i < 7:
+            residual[i] = deviation
+        else:
+            seasonal[i] = deviation
+    return trend, seasonal, residual
+
+@njit(types.Tuple((f8, f8, f8, i8, f8, f8, f8, f8, f8))(INPUT), cache=True, fastmath=FASTMATH)
+def insights_kernel(x):
+    """
+    Summary statistics for a net cash flow series, in two passes
+
+    Returns:
+        (total, mean, std, negative_days, first, last, recent_mean,
+         trend_corr, max_drawdown) where std uses ddof=1, recent_mean
+         covers the last 30 values, trend_corr is the Pearson correlation
+         with the natural index 0..n-1, and max_drawdown is the largest fall
+         of the cumulative flow relative to its running peak. Drawdowns are
+         only measured while that peak is positive (a ratio to a zero or
+         negative balance has no meaning), so it is 0 when it never is.
+    """
+    n = x.size
+    if n == 0:
+        return 0.0, np.nan, np.nan, 0, np.nan, np.nan, np.nan, np.nan, 0.0
+
+    total = 0.0
+    recent_total = 0.0
+    recent_start = max(n - 30, 0)
+    negative_days = 0
+
+    cumulative = 0.0
+    running_max = -np.inf
+    max_drawdown = 0.0
+
+    for i in range(n):
+        v = x[i]
+        total += v
+        if v < 0:
+            negative_days += 1
+        if i >= recent_start:
+            recent_total += v
+
+        cumulative += v
+        if cumulative > running_max:
+            running_max = cumulative
+        if running_max > 0:
+            drawdown = (cumulative - running_max) / running_max
+            if drawdown < max_drawdown:
+                max_drawdown = drawdown
+
+    mean = total / n
+    recent_mean = recent_total / (n - recent_start)
+
+    # Second pass around the mean for the spread and trend
+    ss_x, cov = _centred_moments(x, mean)
+    std = np.sqrt(ss_x / (n - 1)) if n > 1 else np.nan
+    trend_corr = _index_corr(n, ss_x, cov)
+
+    return (total, mean, std, negative_days, x[0], x[n - 1], recent_mean,
+            trend_corr, max_drawdown)
+
+@njit(types.UniTuple(f8[:], 3)(INPUT, i8, i8), cache=True, fastmath=FASTMATH)
+def rolling_stats(x, w_short, w_long):
+    """
+    Trailing-window mean over w_short and w_long and sample std over w_short
+    
+    Matches pandas rolling(w, min_periods=1): windows are truncated at the
+    start of the series and std is NaN until two values are available.
+    """
+    n = x.size
+    mean_short = np.empty(n)
+    mean_long = np.empty(n)
+    std_short = np.empty(n)
+
+    sum_short = 0.0
+    sum_long = 0.0
+    for i in range(n):
+        v = x[i]
+        sum_short += v
+        sum_long += v
+        if i >= w_short:
+            sum_short -= x[i - w_short]
+        if i >= w_long:
+            sum_long -= x[i - w_long]
+
+        k_short = min(i + 1, w_short)
+        k_long = min(i + 1, w_long)
+        m = sum_short / k_short
+        mean_short[i] = m
+        mean_long[i] = sum_long / k_long
+
+        # Short window is a handful of values; centring on the mean avoids the
+        # cancellation of sum-of-squares at large cash magnitudes
+        if k_short < 2:
+            std_short[i] = np.nan
+        else:
+            ss = 0.0
+            for j in range(i - k_short + 1, i + 1):
+                d = x[j] - m
+                ss += d * d
+            std_short[i] = np.sqrt(ss / (k_short - 1))
+
+    return mean_short, mean_long, std_short
+
+# Window lengths of the preprocessing features, fixed at compile time
+WEEK = 7
+MONTH = 30
+
+@njit(types.UniTuple(f8[:], 3)(INPUT), cache=True, fastmath=FASTMATH)
+def rolling_stats_week_month(x):
+    """
+    rolling_stats(x, WEEK, MONTH) specialized for the constant window lengths
+    
+    The first MONTH values go through the generic kernel. After that both
+    windows are full, so the steady-state loop has no truncation branches and
+    the WEEK-long std loop has a constant trip count LLVM can unroll.
+    """
+    n = x.size
+    head = min(n, MONTH)
+    mean_short = np.empty(n)
+    mean_long = np.empty(n)
+    std_short = np.empty(n)
+
+    mean_short[:head], mean_long[:head], std_short[:head] = rolling_stats(x[:head], WEEK, MONTH)
+    if n <= MONTH:
+        return mean_short, mean_long, std_short
+
+    sum_short = 0.0
+    for j in range(head - WEEK, head):
+        sum_short += x[j]
+    sum_long = 0.0
+    for j in range(head - MONTH, head):
+        sum_long += x[j]
+
+    for i in range(head, n):
+        v = x[i]
+        sum_short += v - x[i - WEEK]
+        sum_long += v - x[i - MONTH]
+        m = sum_short / WEEK
+        mean_short[i] = m
+        mean_long[i] = sum_long / MONTH
+
+        ss = 0.0
+        for j in range(i - WEEK + 1, i + 1):
+            d = x[j] - m
+            ss += d * d
+        std_short[i] = np.sqrt(ss / (WEEK - 1))
+
+    return mean_short, mean_long, std_short
+
+# Lags and windows of the optimizer's and projection engine's ML features
+ML_LAGS = (1, 3, 7, 14, 30)
+ML_WINDOWS = (7, 14, 30)
+
+@njit(types.Tuple((f8, i8))(f8, i8, f8, f8), cache=True, fastmath=FASTMATH)
+def _window_update(total, nan_count, v, sign):
+    """
+    Add (sign 1) or remove (sign -1) a value from a running window sum
+    
+    NaNs are counted instead of summed, so the sum recovers once they leave
+    the window and only windows that contain one are NaN, as with pandas.
+    """
+    if np.isnan(v):
+        return total, nan_count + int(sign)
+    return total + sign * v, nan_count
+
+@njit(f8[:, :](INPUT, INPUT, INPUT), cache=True, fastmath=FASTMATH)
+def ml_window_features(cash_in, cash_out, net):
+    """
+    Lag and trailing-window features for the optimizer's prediction model
+    
+    Rows are features in _prepare_ml_data column order: cash_in, cash_out and
+    net lags for each of ML_LAGS, then cash_in, cash_out and net means and net
+    std for each of ML_WINDOWS. As with pandas shift/rolling(w), values are NaN
+    until the lag or the full window is available, and while a window holds a
+    NaN.
+    """
+    n = net.size
+    out = np.full((3 * len(ML_LAGS) + 4 * len(ML_WINDOWS), n), np.nan)
+    
+    row = 0
+    for lag in ML_LAGS:
+        out[row, lag:] = cash_in[:n - lag]
+        out[row + 1, lag:] = cash_out[:n - lag]
+        out[row + 2, lag:] = net[:n - lag]
+        row += 3
+    
+    for w in ML_WINDOWS:
+        sum_in, nan_in = 0.0, 0
+        sum_out, nan_out = 0.0, 0
+        sum_net, nan_net = 0.0, 0
+        for i in range(n):
+            sum_in, nan_in = _window_update(sum_in, nan_in, cash_in[i], 1.0)
+            sum_out, nan_out = _window_update(sum_out, nan_out, cash_out[i], 1.0)
+            sum_net, nan_net = _window_update(sum_net, nan_net, net[i], 1.0)
+            if i >= w:
+                sum_in, nan_in = _window_update(sum_in, nan_in, cash_in[i - w], -1.0)
+                sum_out, nan_out = _window_update(sum_out, nan_out, cash_out[i - w], -1.0)
+                sum_net, nan_net = _window_update(sum_net, nan_net, net[i - w], -1.0)
+            if i < w - 1:
+                continue
+            
+            if nan_in == 0:
+                out[row, i] = sum_in / w
+            if nan_out == 0:
+                out[row + 1, i] = sum_out / w
+            if nan_net > 0:
+                continue
+            m = sum_net / w
+            out[row + 2, i] = m
+            ss = 0.0
+            for j in range(i - w + 1, i + 1):
+                d = net[j] - m
+                ss += d * d
+            out[row + 3, i] = np.sqrt(ss / (w - 1))
+        row += 4
+    
+    return out
+
+@njit(f8[:, :](INPUT, INPUT, INPUT), cache=True, fastmath=FASTMATH)
+def projection_window_features(cash_in, cash_out, net):
+    """
+    Trailing-window features for the projection engine's models
+    
+    Rows are cash_in, cash_out and net means followed by net std, min and max
+    for each of ML_WINDOWS, in _prepare_ml_features column order. As with
+    pandas rolling(w), values are NaN until the full window is available, and
+    while a window holds a NaN.
+    """
+    n = net.size
+    out = np.full((6 * len(ML_WINDOWS), n), np.nan)
+    
+    row = 0
+    for w in ML_WINDOWS:
+        sum_in, nan_in = 0.0, 0
+        sum_out, nan_out = 0.0, 0
+        sum_net, nan_net = 0.0, 0
+        for i in range(n):
+            sum_in, nan_in = _window_update(sum_in, nan_in, cash_in[i], 1.0)
+            sum_out, nan_out = _window_update(sum_out, nan_out, cash_out[i], 1.0)
+            sum_net, nan_net = _window_update(sum_net, nan_net, net[i], 1.0)
+            if i >= w:
+                sum_in, nan_in = _window_update(sum_in, nan_in, cash_in[i - w], -1.0)
+                sum_out, nan_out = _window_update(sum_out, nan_out, cash_out[i - w], -1.0)
+                sum_net, nan_net = _window_update(sum_net, nan_net, net[i - w], -1.0)
+            if i < w - 1:
+                continue
+            
+            if nan_in == 0:
+                out[row, i] = sum_in / w
+            if nan_out == 0:
+                out[row + 1, i] = sum_out / w
+            if nan_net > 0:
+                continue
+            m = sum_net / w
+            out[row + 2, i] = m
+            
+            # Windows are at most a month, so std and extrema rescan them
+            ss = 0.0
+            lo = np.inf
+            hi = -np.inf
+            for j in range(i - w + 1, i + 1):
+                v = net[j]
+                d = v - m
+                ss += d * d
+                lo = min(lo, v)
+                hi = max(hi, v)
+            out[row + 3, i] = np.sqrt(ss / (w - 1))
+            out[row + 4, i] = lo
+            out[row + 5, i] = hi
+        row += 6
+    
+    return out
+
+@njit(types.UniTuple(i8, 2)(i8, f8), cache=True)
+def _percentile_ranks(n, q):
+    """Ranks np.percentile's linear interpolation reads for the q-th percentile"""
+    lo = int(np.floor(q / 100.0 * (n - 1)))
+    return lo, min(lo + 1, n - 1)
+
+@njit(f8(f8[:], i8, f8), cache=True, fastmath=FASTMATH)
+def _interpolated_percentile(partitioned, n, q):
+    """q-th percentile of an array partitioned at both _percentile_ranks(n, q)"""
+    position = q / 100.0 * (n - 1)
+    lo, hi = _percentile_ranks(n, q)
+    return partitioned[lo] + (partitioned[hi] - partitioned[lo]) * (position - lo)
+
+@njit(types.UniTuple(f8, 7)(INPUT, INPUT, i8), cache=True, fastmath=FASTMATH, error_model='numpy')
+def risk_kernel(net, cumulative, window):
+    """
+    Tail, drawdown and rolling-volatility metrics for the optimizer
+    
+    Returns:
+        (var_95, var_99, cvar_95, cvar_99, max_drawdown, avg_volatility,
+         volatility_trend) where VaR are the 5th/1st percentiles of the
+         non-NaN values of net (NaN when there are none), CVaR the mean at or
+         below them, drawdown is relative to the running
+         peak of cumulative, and the volatility figures come from the sample
+         std over each full trailing window without a NaN (trend is last
+         minus first)
+    """
+    n = net.size
+    if n == 0:
+        return np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan
+    
+    # Percentiles of the non-NaN values, as np.nanpercentile; np.partition would
+    # sort NaNs to the end and shift the ranks. One O(n) selection places the
+    # ranks both percentiles interpolate between.
+    valid = net[~np.isnan(net)]
+    n_valid = valid.size
+    if n_valid == 0:
+        var_95 = np.nan
+        var_99 = np.nan
+    else:
+        lo_95, hi_95 = _percentile_ranks(n_valid, 5.0)
+        lo_99, hi_99 = _percentile_ranks(n_valid, 1.0)
+        partitioned = np.partition(valid, np.array([lo_99, hi_99, lo_95, hi_95]))
+        var_95 = _interpolated_percentile(partitioned, n_valid, 5.0)
+        var_99 = _interpolated_percentile(partitioned, n_valid, 1.0)
+    
+    tail_95 = 0.0
+    tail_95_count = 0
+    tail_99 = 0.0
+    tail_99_count = 0
+    running_max = -np.inf
+    max_drawdown = np.nan
+    window_sum = 0.0
+    window_nans = 0
+    vol_total = 0.0
+    vol_count = 0
+    first_vol = np.nan
+    last_vol = np.nan
+    for i in range(n):
+        v = net[i]
+        if not np.isnan(v) and v <= var_95:
+            tail_95 += v
+            tail_95_count += 1
+            if v <= var_99:
+                tail_99 += v
+                tail_99_count += 1
+        
+        c = cumulative[i]
+        if c > running_max:
+            running_max = c
+        drawdown = (c - running_max) / running_max
+        if not np.isnan(drawdown) and (np.isnan(max_drawdown) or drawdown < max_drawdown):
+            max_drawdown = drawdown
+        
+        window_sum, window_nans = _window_update(window_sum, window_nans, v, 1.0)
+        if i >= window:
+            window_sum, window_nans = _window_update(window_sum, window_nans, net[i - window], -1.0)
+        if i < window - 1 or window_nans > 0:
+            continue
+        
+        m = window_sum / window
+        ss = 0.0
+        for j in range(i - window + 1, i + 1):
+            d = net[j] - m
+            ss += d * d
+        last_vol = np.sqrt(ss / (window - 1))
+        if vol_count == 0:
+            first_vol = last_vol
+        vol_total += last_vol
+        vol_count += 1
+    
+    cvar_95 = tail_95 / tail_95_count if tail_95_count else np.nan
+    cvar_99 = tail_99 / tail_99_count if tail_99_count else np.nan
+    avg_volatility = vol_total / vol_count if vol_count else np.nan
+    return (var_95, var_99, cvar_95, cvar_99, max_drawdown, avg_volatility,
+            last_vol - first_vol)
+
+@njit(f8[:](INPUT), cache=True, fastmath=FASTMATH)
+def robust_zscores(x):
+    """
+    Absolute modified z-scores, 0.6745 * |x - median| / MAD (Iglewicz & Hoaglin)
+    
+    Falls back to the mean absolute deviation when more than half the values
+    equal the median and MAD is zero.
+    """
+    n = x.size
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    median = np.median(x)
+    deviation = np.abs(x - median)
+    mad = np.median(deviation)
+    if mad > 0:
+        scale = mad / 0.6745
+    else:
+        scale = max(deviation.mean() * 1.253314, 1e-9)
+
+    for i in range(n):
+        out[i] = deviation[i] / scale
+    return out
+
+@njit(types.float32[:](INPUT, INPUT), cache=True, fastmath=FASTMATH, error_model='numpy')
+def volatility_kernel(std, mean):
+    """Coefficient of variation std / |mean| as float32, with NaN mapped to 0"""
+    n = std.size
+    out = np.empty(n, dtype=np.float32)
+    for i in range(n):
+        v = std[i] / abs(mean[i])
+        out[i] = 0.0 if np.isnan(v) else v
+    return out
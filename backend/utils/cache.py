@@ -0,0 +1,65 @@
+import functools
+import hashlib
+import logging
+from typing import Callable, Optional
+
+import orjson
+import redis
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """Redis-backed memoization for expensive, pure computations"""
+
+    def __init__(self, redis_url: str, default_ttl: int = 300):
+        self.default_ttl = default_ttl
+        self.client = redis.Redis.from_url(
+            redis_url, socket_connect_timeout=0.5, socket_timeout=0.5
+        )
+
+    @staticmethod
+    def make_key(prefix: str, *args, **kwargs) -> str:
+        """Build a cache key from a canonical serialization of the arguments"""
+        payload = orjson.dumps([args, kwargs], option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        return f'sageorb:{prefix}:{digest}'
+
+    def cached(self, prefix: str, ttl: Optional[int] = None) -> Callable:
+        """
+        Cache a function's JSON-serializable result in Redis
+
+        Args:
+            prefix: Key namespace for the wrapped function
+            ttl: Expiry in seconds (defaults to the cache's default_ttl)
+
+        Redis errors never fail the call; the function is simply executed.
+        """
+        expiry = ttl or self.default_ttl
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self.make_key(prefix, *args, **kwargs)
+
+                try:
+                    hit = self.client.get(key)
+                    if hit is not None:
+                        return orjson.loads(hit)
+                except redis.RedisError as e:
+                    logger.warning(f"Cache lookup failed for {prefix}: {str(e)}")
+
+                result = func(*args, **kwargs)
+
+                try:
+                    payload = orjson.dumps(
+                        result, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                    )
+                    self.client.setex(key, expiry, payload)
+                except (redis.RedisError, TypeError) as e:
+                    logger.warning(f"Cache store failed for {prefix}: {str(e)}")
+
+                return result
+
+            return wrapper
+
+        return decorator
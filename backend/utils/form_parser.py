@@ -0,0 +1,38 @@
+from flask import Request
+from werkzeug.formparser import FormDataParser, MultiPartParser
+
+UPLOAD_BUFFER_SIZE = 1 << 20  # 1 MiB, up from werkzeug's 64 KiB
+
+class LargeBufferFormDataParser(FormDataParser):
+    """
+    Form parser that reads multipart bodies in large chunks
+
+    werkzeug has no hook for the MultiPartParser buffer size, so this copies
+    its private FormDataParser._parse_multipart. Werkzeug is pinned in
+    requirements.txt for that reason; recheck this override against the new
+    version before upgrading it.
+    """
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        charset = self.charset if self.charset != 'utf-8' else None
+        errors = self.errors if self.errors != 'replace' else None
+        parser = MultiPartParser(
+            stream_factory=self.stream_factory,
+            charset=charset,
+            errors=errors,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+            buffer_size=UPLOAD_BUFFER_SIZE,
+        )
+        boundary = options.get('boundary', '').encode('ascii')
+
+        if not boundary:
+            raise ValueError('Missing boundary')
+
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+class UploadRequest(Request):
+    """Request class using the large-buffer multipart parser"""
+    form_data_parser_class = LargeBufferFormDataParser
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, Union
+
+import orjson
+import pandas as pd
+from flask.json.provider import JSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson does not serialize natively"""
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, datetime):  # e.g. pd.Timestamp
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def orjson_dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes with numpy and pandas support"""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson_dumps(obj).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson_dumps(obj)
+        return self._app.response_class(body, mimetype='application/json')
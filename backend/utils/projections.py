@@ -1,275 +1,374 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from typing import Dict, List, Optional, Tuple, Union
+import lightgbm as lgb
 from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from sklearn.preprocessing import StandardScaler
 import warnings
-from datetime import datetime, timedelta
+from collections import OrderedDict
+import hashlib
 import logging
+import threading
+
+from utils.data_loader import parse_dates, prepare_cash_flow_frame
+from utils._kernels import (
+    ML_LAGS, ML_WINDOWS, decompose_kernel, linear_fit_kernel, projection_window_features, trend_corr_kernel
+)
 
 warnings.filterwarnings('ignore')
 logger = logging.getLogger(__name__)
 
+# Shapes the per-day projections can be returned in
+PROJECTION_LAYOUTS = ('records', 'columns')
+
+# Column names of the lag features, in _prepare_ml_features order
+LAG_FEATURE_COLUMNS = [
+    f'{series}_lag_{lag}' for lag in ML_LAGS for series in ('cash_in', 'cash_out', 'net_cash_flow')
+]
+
+# Column names of projection_window_features' rows, in kernel order
+ROLLING_FEATURE_COLUMNS = [
+    name for window in ML_WINDOWS for name in (
+        f'cash_in_ma_{window}', f'cash_out_ma_{window}',
+        f'net_cash_flow_ma_{window}', f'net_cash_flow_std_{window}',
+        f'net_cash_flow_min_{window}', f'net_cash_flow_max_{window}'
+    )
+]
+
+# Model inputs, in _prepare_ml_features column order: daily amounts, calendar,
+# lag and rolling features
+FEATURE_COLUMNS = [
+    'cash_in', 'cash_out', 'day_of_week', 'month', 'quarter', 'day_of_year', 'week_of_year'
+] + LAG_FEATURE_COLUMNS + ROLLING_FEATURE_COLUMNS
+
+# Distinct datasets whose fitted ML models each engine keeps in memory
+MODEL_CACHE_SIZE = 4
+
+def _frame_digest(df: pd.DataFrame) -> bytes:
+    """Content hash of the columns the ML features are derived from"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64))
+    digest.update(df['cash_in'].to_numpy(dtype=np.float64))
+    digest.update(df['cash_out'].to_numpy(dtype=np.float64))
+    return digest.digest()
+
+def _column_values(column: Union[List, np.ndarray, Dict]) -> List:
+    """Per-day Python values of a projection column; a mapping of columns yields one dict per day"""
+    if isinstance(column, dict):
+        names = list(column)
+        return [dict(zip(names, day)) for day in zip(*map(_column_values, column.values()))]
+    return column.tolist() if isinstance(column, np.ndarray) else column
+
+def _columns_to_records(columns: Dict[str, Union[List, np.ndarray, Dict]]) -> List[Dict]:
+    """Zip per-field projection columns into one record per day, with Python floats"""
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*map(_column_values, columns.values()))]
+
 class AdvancedProjectionEngine:
     """Advanced cash flow projection engine with multiple forecasting models"""
     
     def __init__(self, forecast_horizon: int = 90):
         self.forecast_horizon = forecast_horizon
-        self.models = {}
-        self.scalers = {}
+        # digest -> (df_ml, models, scalers); fitted models are only read after
+        # training, so concurrent requests can share them
+        self._model_cache = OrderedDict()
+        self._model_cache_lock = threading.Lock()
         
-    def generate_liquidity_projection(self, data: List[Dict], method: str = 'ensemble') -> Dict:
+    def generate_liquidity_projection(self, data: Union[List[Dict], Dict[str, List], pd.DataFrame],
+                                      method: str = 'ensemble', layout: str = 'records') -> Dict:
         """
         Generate comprehensive liquidity projections
         
         Args:
-            data: List of cash flow records
+            data: List of cash flow records, a column-name -> values mapping
+                (lists or arrays, the fastest input), or a frame from
+                prepare_cash_flow_frame
             method: Projection method ('simple', 'advanced', 'ensemble', 'ml')
+            layout: 'records' for one dict per projected day, or 'columns' for
+                one float64 array (date strings: list) per field, which orjson
+                serializes directly; per-model ML predictions are a mapping of
+                model name -> array
         
         Returns:
             Projection results with confidence intervals
         """
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
+        if layout not in PROJECTION_LAYOUTS:
+            raise ValueError(f"Unknown projection layout: {layout}")
         
+        # Every method builds its projections column-wise; records are only
+        # assembled here, for callers that asked for them
         if method == 'simple':
-            return self._simple_projection(df)
-        elif method == 'advanced':
-            return self._advanced_projection(df)
-        elif method == 'ensemble':
-            return self._ensemble_projection(df)
-        elif method == 'ml':
-            return self._ml_projection(df)
+            # Only needs the ordered net series, so raw records skip the frame entirely
+            result = self._simple_projection(data)
         else:
-            raise ValueError(f"Unknown projection method: {method}")
-    
-    def _simple_projection(self, df: pd.DataFrame) -> Dict:
-        """Simple moving average projection"""
-        df['net_cash_flow'] = df['cash_in'] - df['cash_out']
-        df['cumulative_cash'] = df['net_cash_flow'].cumsum()
-        
-        # Calculate moving averages
-        ma_7 = df['net_cash_flow'].rolling(7, min_periods=1).mean()
-        ma_30 = df['net_cash_flow'].rolling(30, min_periods=1).mean()
-        
-        # Generate future projections
-        last_date = df['date'].max()
-        future_dates = pd.date_range(start=last_date + timedelta(days=1), 
-                                   periods=self.forecast_horizon, freq='D')
-        
-        # Simple trend projection
-        recent_avg = ma_7.iloc[-1] if not pd.isna(ma_7.iloc[-1]) else df['net_cash_flow'].mean()
-        trend = np.polyfit(range(len(df)), df['net_cash_flow'], 1)[0]
+            df = data.copy() if isinstance(data, pd.DataFrame) else prepare_cash_flow_frame(data)
+            
+            if method == 'advanced':
+                projection = self._advanced_projection
+            elif method == 'ensemble':
+                projection = self._ensemble_projection
+            elif method == 'ml':
+                projection = self._ml_projection
+            else:
+                raise ValueError(f"Unknown projection method: {method}")
+            result = projection(df, base=self._projection_base(df))
         
-        projections = []
-        cumulative = df['cumulative_cash'].iloc[-1]
+        if layout == 'records':
+            result['projections'] = _columns_to_records(result['projections'])
+        return result
+    
+    @staticmethod
+    def _cash_flow_arrays(data: Union[List[Dict], Dict[str, List], pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray]:
+        """Date-ordered datetime64 dates and float64 net cash flow from records, columns or a frame"""
+        if isinstance(data, pd.DataFrame):
+            # Frames from prepare_cash_flow_frame are already sorted
+            dates = data['date'].to_numpy()
+            return dates, np.asarray(data['cash_in'] - data['cash_out'], dtype=np.float64)
+        
+        if isinstance(data, dict):
+            # Columns (lists or arrays) convert without visiting each record
+            dates = np.asarray(parse_dates(data['date']), dtype='datetime64[ns]')
+            cash_in = np.array(data['cash_in'], dtype=np.float64)
+            cash_out = np.asarray(data['cash_out'], dtype=np.float64)
+        else:
+            count = len(data)
+            dates = np.asarray(parse_dates([record['date'] for record in data]), dtype='datetime64[ns]')
+            cash_in = np.fromiter((record['cash_in'] for record in data), dtype=np.float64, count=count)
+            cash_out = np.fromiter((record['cash_out'] for record in data), dtype=np.float64, count=count)
+        net_cash_flow = np.subtract(cash_in, cash_out, out=cash_in)
+        
+        order = np.argsort(dates, kind='stable')
+        return dates[order], net_cash_flow[order]
+    
+    def _projection_base(self, data: Union[List[Dict], Dict[str, List], pd.DataFrame]) -> Dict:
+        """
+        Inputs every projection method starts from, computed once per request
         
-        for i, date in enumerate(future_dates):
-            projected_flow = recent_avg + trend * (i + 1)
-            cumulative += projected_flow
-            
-            projections.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'net_cash_flow': float(projected_flow),
-                'cumulative_cash': float(cumulative),
-                'confidence_lower': float(projected_flow * 0.8),
-                'confidence_upper': float(projected_flow * 1.2)
-            })
+        Returns:
+            net_cash_flow: date-ordered float64 history
+            closing_balance: cumulative cash at the last observation
+            future_dates: datetime64[D] days of the horizon after the last observation
+            future_date_strings: the same days as 'YYYY-MM-DD' strings
+        """
+        dates, net_cash_flow = self._cash_flow_arrays(data)
+        steps = np.arange(1, self.forecast_horizon + 1)
+        future_dates = dates[-1].astype('datetime64[D]') + steps.astype('timedelta64[D]')
+        return {
+            'net_cash_flow': net_cash_flow,
+            'closing_balance': float(np.nansum(net_cash_flow)),
+            'future_dates': future_dates,
+            # Formatted in one vectorized cast and shared by every method's output
+            'future_date_strings': future_dates.astype(str).tolist()
+        }
+    
+    def _simple_projection(self, data: Union[List[Dict], Dict[str, List], pd.DataFrame],
+                           base: Optional[Dict] = None) -> Dict:
+        """Simple moving average projection"""
+        if base is None:
+            base = self._projection_base(data)
+        net_cash_flow = base['net_cash_flow']
+        
+        # Trailing 7-day average, falling back to the overall mean
+        recent_avg = net_cash_flow[-7:].mean()
+        if np.isnan(recent_avg):
+            recent_avg = np.nanmean(net_cash_flow)
+        trend, _ = linear_fit_kernel(net_cash_flow)
+        
+        # Simple trend projection, accumulated from the historical closing balance
+        steps = np.arange(1, self.forecast_horizon + 1)
+        projected_flows = recent_avg + trend * steps
+        cumulative = np.cumsum(projected_flows)
+        cumulative += base['closing_balance']
         
         return {
             'method': 'simple',
-            'projections': projections,
+            'projections': {
+                'date': base['future_date_strings'],
+                'net_cash_flow': projected_flows,
+                'cumulative_cash': cumulative,
+                'confidence_lower': projected_flows * 0.8,
+                'confidence_upper': projected_flows * 1.2
+            },
             'metrics': {
                 'trend': float(trend),
                 'recent_average': float(recent_avg),
-                'volatility': float(df['net_cash_flow'].std())
+                'volatility': float(np.nanstd(net_cash_flow, ddof=1))
             }
         }
     
-    def _advanced_projection(self, df: pd.DataFrame) -> Dict:
+    def _advanced_projection(self, df: pd.DataFrame, base: Optional[Dict] = None) -> Dict:
         """Advanced projection with seasonality and multiple components"""
-        df['net_cash_flow'] = df['cash_in'] - df['cash_out']
-        df['cumulative_cash'] = df['net_cash_flow'].cumsum()
-        
-        # Add time-based features
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['month'] = df['date'].dt.month
-        df['quarter'] = df['date'].dt.quarter
-        df['day_of_year'] = df['date'].dt.dayofyear
+        if base is None:
+            base = self._projection_base(df)
+        net_cash_flow = base['net_cash_flow']
         
         # Calculate seasonal patterns
         seasonal_patterns = self._calculate_seasonal_patterns(df)
         
         # Decompose time series
-        trend, seasonal, residual = self._decompose_timeseries(df['net_cash_flow'])
+        trend, seasonal, residual = self._decompose_timeseries(net_cash_flow)
         
         # Generate projections
-        last_date = df['date'].max()
-        future_dates = pd.date_range(start=last_date + timedelta(days=1), 
-                                   periods=self.forecast_horizon, freq='D')
+        future_dates = pd.DatetimeIndex(base['future_dates'])
         
-        projections = []
-        cumulative = df['cumulative_cash'].iloc[-1]
+        # Trend component, extrapolated from the last fitted step for every day at once
+        steps = np.arange(1, self.forecast_horizon + 1)
+        if len(trend) > 1:
+            trend_components = trend[-1] + (trend[-1] - trend[-2]) * steps
+        else:
+            trend_components = np.full(self.forecast_horizon, trend[-1])
         
-        for i, date in enumerate(future_dates):
-            # Trend component
-            trend_component = trend[-1] + (trend[-1] - trend[-2]) * (i + 1) if len(trend) > 1 else trend[-1]
-            
-            # Seasonal component
-            day_of_year = date.dayofyear
-            seasonal_component = seasonal_patterns.get(day_of_year, 0)
-            
-            # Combined projection
-            projected_flow = trend_component + seasonal_component
-            
-            # Add some randomness based on historical residuals
-            if len(residual) > 0:
-                noise = np.random.choice(residual, 1)[0] * 0.1  # Reduce noise impact
-                projected_flow += noise
-            
-            cumulative += projected_flow
-            
-            # Calculate confidence intervals
-            std_dev = df['net_cash_flow'].std()
-            confidence_lower = projected_flow - 1.96 * std_dev
-            confidence_upper = projected_flow + 1.96 * std_dev
-            
-            projections.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'net_cash_flow': float(projected_flow),
-                'cumulative_cash': float(cumulative),
-                'trend_component': float(trend_component),
-                'seasonal_component': float(seasonal_component),
-                'confidence_lower': float(confidence_lower),
-                'confidence_upper': float(confidence_upper)
-            })
+        # Seasonal component, gathered from a day-of-year table (0 for days never observed)
+        seasonal_table = np.zeros(367)
+        seasonal_table[list(seasonal_patterns)] = list(seasonal_patterns.values())
+        seasonal_components = seasonal_table[future_dates.dayofyear.to_numpy()]
+        
+        # Some randomness based on historical residuals, drawn for every day at once
+        if len(residual) > 0:
+            noise = np.random.choice(residual, self.forecast_horizon) * 0.1  # Reduce noise impact
+        else:
+            noise = np.zeros(self.forecast_horizon)
+        
+        # Combined projection
+        projected_flows = trend_components + seasonal_components + noise
+        cumulative = np.cumsum(projected_flows)
+        cumulative += base['closing_balance']
+        
+        # Calculate confidence intervals; the band width does not change over the horizon
+        std_dev = np.nanstd(net_cash_flow, ddof=1)
         
         return {
             'method': 'advanced',
-            'projections': projections,
+            'projections': {
+                'date': base['future_date_strings'],
+                'net_cash_flow': projected_flows,
+                'cumulative_cash': cumulative,
+                'trend_component': trend_components,
+                'seasonal_component': seasonal_components,
+                'confidence_lower': projected_flows - 1.96 * std_dev,
+                'confidence_upper': projected_flows + 1.96 * std_dev
+            },
             'seasonal_patterns': seasonal_patterns,
             'decomposition': {
-                'trend_strength': float(np.corrcoef(range(len(trend)), trend)[0, 1]),
-                'seasonal_strength': float(np.std(seasonal) / np.std(df['net_cash_flow'])),
+                'trend_strength': float(trend_corr_kernel(trend)),
+                'seasonal_strength': float(np.std(seasonal) / np.nanstd(net_cash_flow)),
                 'residual_std': float(np.std(residual))
             }
         }
     
-    def _ensemble_projection(self, df: pd.DataFrame) -> Dict:
+    def _ensemble_projection(self, df: pd.DataFrame, base: Optional[Dict] = None) -> Dict:
         """Ensemble projection combining multiple methods"""
-        # Generate projections using different methods
-        simple_proj = self._simple_projection(df)
-        advanced_proj = self._advanced_projection(df)
-        ml_proj = self._ml_projection(df)
-        
-        # Combine projections (weighted average)
-        ensemble_projections = []
-        
-        for i in range(len(simple_proj['projections'])):
-            simple_flow = simple_proj['projections'][i]['net_cash_flow']
-            advanced_flow = advanced_proj['projections'][i]['net_cash_flow']
-            ml_flow = ml_proj['projections'][i]['net_cash_flow']
-            
-            # Weighted average (can be adjusted based on model performance)
-            weights = [0.2, 0.3, 0.5]  # simple, advanced, ml
-            ensemble_flow = (simple_flow * weights[0] + 
-                           advanced_flow * weights[1] + 
-                           ml_flow * weights[2])
-            
-            # Calculate ensemble cumulative
-            if i == 0:
-                cumulative = df['cumulative_cash'].iloc[-1] if 'cumulative_cash' in df.columns else 0
-            else:
-                cumulative = ensemble_projections[i-1]['cumulative_cash']
-            cumulative += ensemble_flow
-            
-            ensemble_projections.append({
-                'date': simple_proj['projections'][i]['date'],
-                'net_cash_flow': float(ensemble_flow),
-                'cumulative_cash': float(cumulative),
-                'simple_projection': float(simple_flow),
-                'advanced_projection': float(advanced_flow),
-                'ml_projection': float(ml_flow),
-                'confidence_lower': float(ensemble_flow * 0.85),
-                'confidence_upper': float(ensemble_flow * 1.15)
-            })
+        # Generate projections using different methods, sharing one parse of the history
+        if base is None:
+            base = self._projection_base(df)
+        simple_proj = self._simple_projection(df, base=base)
+        advanced_proj = self._advanced_projection(df, base=base)
+        ml_proj = self._ml_projection(df, base=base)
+        
+        # Combine projections (weighted average; can be adjusted based on model performance)
+        weights = {'simple': 0.2, 'advanced': 0.3, 'ml': 0.5}
+        simple_flows = simple_proj['projections']['net_cash_flow']
+        advanced_flows = advanced_proj['projections']['net_cash_flow']
+        ml_flows = ml_proj['projections']['net_cash_flow']
+        ensemble_flows = (simple_flows * weights['simple'] +
+                          advanced_flows * weights['advanced'] +
+                          ml_flows * weights['ml'])
+        
+        # Calculate ensemble cumulative
+        cumulative = np.cumsum(ensemble_flows)
+        cumulative += base['closing_balance']
         
         return {
             'method': 'ensemble',
-            'projections': ensemble_projections,
-            'model_weights': {'simple': 0.2, 'advanced': 0.3, 'ml': 0.5},
+            'projections': {
+                'date': simple_proj['projections']['date'],
+                'net_cash_flow': ensemble_flows,
+                'cumulative_cash': cumulative,
+                'simple_projection': simple_flows,
+                'advanced_projection': advanced_flows,
+                'ml_projection': ml_flows,
+                'confidence_lower': ensemble_flows * 0.85,
+                'confidence_upper': ensemble_flows * 1.15
+            },
+            'model_weights': weights,
             'ensemble_metrics': {
-                'variance_reduction': self._calculate_variance_reduction([
-                    simple_proj['projections'], 
-                    advanced_proj['projections'], 
-                    ml_proj['projections']
-                ])
+                'variance_reduction': self._calculate_variance_reduction([simple_flows, advanced_flows, ml_flows])
             }
         }
     
-    def _ml_projection(self, df: pd.DataFrame) -> Dict:
+    def _ml_projection(self, df: pd.DataFrame, base: Optional[Dict] = None) -> Dict:
         """Machine learning-based projection"""
-        # Prepare features
-        df_ml = self._prepare_ml_features(df)
+        if base is None:
+            base = self._projection_base(df)
         
-        if len(df_ml) < 30:  # Need sufficient data for ML
-            return self._simple_projection(df)
+        # Prepare features and train models, or reuse them for data seen recently
+        df_ml, models, scalers = self._fitted_ml_models(df)
         
-        # Train multiple models
-        models = self._train_ml_models(df_ml)
+        if models is None:  # Need sufficient data for ML
+            return self._simple_projection(df, base=base)
         
         # Generate predictions
-        last_date = df['date'].max()
-        future_dates = pd.date_range(start=last_date + timedelta(days=1), 
-                                   periods=self.forecast_horizon, freq='D')
-        
-        projections = []
-        cumulative = df['cumulative_cash'].iloc[-1] if 'cumulative_cash' in df.columns else 0
+        future_dates = pd.DatetimeIndex(base['future_dates'])
         
         # Prepare future features
         future_features = self._prepare_future_features(df_ml, future_dates)
         
-        for i, (date, features) in enumerate(zip(future_dates, future_features)):
-            # Get predictions from all models
-            predictions = []
-            for model_name, model in models.items():
-                if model_name in self.scalers:
-                    features_scaled = self.scalers[model_name].transform([features])
-                    pred = model.predict(features_scaled)[0]
-                else:
-                    pred = model.predict([features])[0]
-                predictions.append(pred)
-            
-            # Ensemble prediction
-            projected_flow = np.mean(predictions)
-            cumulative += projected_flow
-            
-            # Calculate confidence interval based on model agreement
-            std_pred = np.std(predictions)
-            confidence_lower = projected_flow - 1.96 * std_pred
-            confidence_upper = projected_flow + 1.96 * std_pred
-            
-            projections.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'net_cash_flow': float(projected_flow),
-                'cumulative_cash': float(cumulative),
-                'model_predictions': {name: float(pred) for name, pred in zip(models.keys(), predictions)},
-                'prediction_std': float(std_pred),
-                'confidence_lower': float(confidence_lower),
-                'confidence_upper': float(confidence_upper)
-            })
+        # Predict the whole horizon in one call per model, one row per model
+        predictions = np.vstack([
+            model.predict(scalers[name].transform(future_features) if name in scalers else future_features)
+            for name, model in models.items()
+        ])
+        
+        # Ensemble prediction, with confidence intervals based on model agreement
+        projected_flows = predictions.mean(axis=0)
+        std_preds = predictions.std(axis=0)
+        cumulative = np.cumsum(projected_flows)
+        cumulative += base['closing_balance']
         
         return {
             'method': 'ml',
-            'projections': projections,
-            'model_performance': self._evaluate_models(df_ml, models),
+            'projections': {
+                'date': base['future_date_strings'],
+                'net_cash_flow': projected_flows,
+                'cumulative_cash': cumulative,
+                'model_predictions': dict(zip(models.keys(), predictions)),
+                'prediction_std': std_preds,
+                'confidence_lower': projected_flows - 1.96 * std_preds,
+                'confidence_upper': projected_flows + 1.96 * std_preds
+            },
+            'model_performance': self._evaluate_models(df_ml, models, scalers),
             'feature_importance': self._get_feature_importance(df_ml, models)
         }
     
+    def _fitted_ml_models(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[Dict], Optional[Dict]]:
+        """
+        Feature frame and trained (models, scalers) for a cash flow frame
+        
+        Results are memoized per engine on a digest of the dates and amounts, so
+        projecting the same data again (e.g. 'ml' then 'ensemble', or an
+        analysis after a projection) skips feature building and training.
+        models and scalers are None when there are too few rows to train on.
+        """
+        key = _frame_digest(df)
+        with self._model_cache_lock:
+            fitted = self._model_cache.get(key)
+            if fitted is not None:
+                self._model_cache.move_to_end(key)
+                return fitted
+        
+        df_ml = self._prepare_ml_features(df)
+        if len(df_ml) < 30:
+            fitted = (df_ml, None, None)
+        else:
+            fitted = (df_ml, *self._train_ml_models(df_ml))
+        
+        with self._model_cache_lock:
+            self._model_cache[key] = fitted
+            if len(self._model_cache) > MODEL_CACHE_SIZE:
+                self._model_cache.popitem(last=False)
+        return fitted
+    
     def _prepare_ml_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Prepare features for machine learning models"""
         df_ml = df.copy()
@@ -285,149 +384,114 @@ class AdvancedProjectionEngine:
         df_ml['day_of_year'] = df_ml['date'].dt.dayofyear
         df_ml['week_of_year'] = df_ml['date'].dt.isocalendar().week
         
-        # Lag features
-        for lag in [1, 3, 7, 14, 30]:
-            df_ml[f'cash_in_lag_{lag}'] = df_ml['cash_in'].shift(lag)
-            df_ml[f'cash_out_lag_{lag}'] = df_ml['cash_out'].shift(lag)
-            df_ml[f'net_cash_flow_lag_{lag}'] = df_ml['net_cash_flow'].shift(lag)
-        
-        # Rolling statistics
-        for window in [7, 14, 30]:
-            df_ml[f'cash_in_ma_{window}'] = df_ml['cash_in'].rolling(window).mean()
-            df_ml[f'cash_out_ma_{window}'] = df_ml['cash_out'].rolling(window).mean()
-            df_ml[f'net_cash_flow_ma_{window}'] = df_ml['net_cash_flow'].rolling(window).mean()
-            df_ml[f'net_cash_flow_std_{window}'] = df_ml['net_cash_flow'].rolling(window).std()
-            df_ml[f'net_cash_flow_min_{window}'] = df_ml['net_cash_flow'].rolling(window).min()
-            df_ml[f'net_cash_flow_max_{window}'] = df_ml['net_cash_flow'].rolling(window).max()
-        
-        # Remove rows with NaN values
-        df_ml = df_ml.dropna()
+        # Lag and rolling features are built as arrays and added in one concat
+        series = tuple(
+            df_ml[col].to_numpy(dtype=np.float64) for col in ('cash_in', 'cash_out', 'net_cash_flow')
+        )
+        n = len(df_ml)
+        lags = np.full((len(LAG_FEATURE_COLUMNS), n), np.nan)
+        row = 0
+        for lag in ML_LAGS:
+            for values in series:
+                lags[row, lag:] = values[:max(n - lag, 0)]
+                row += 1
+        
+        # Rolling statistics, all windows in one compiled pass
+        rolling = projection_window_features(*series)
+        df_ml = pd.concat([
+            df_ml,
+            pd.DataFrame(lags.T, columns=LAG_FEATURE_COLUMNS, index=df_ml.index),
+            pd.DataFrame(rolling.T, columns=ROLLING_FEATURE_COLUMNS, index=df_ml.index)
+        ], axis=1)
+        
+        # Remove rows with NaN model inputs or target; other columns (e.g. an
+        # optional description) are not in the model cache key, so they must
+        # not decide which rows are kept
+        df_ml = df_ml.dropna(subset=FEATURE_COLUMNS + ['net_cash_flow'])
         
         return df_ml
     
-    def _train_ml_models(self, df: pd.DataFrame) -> Dict:
-        """Train multiple machine learning models"""
-        # Prepare features and target
-        feature_cols = [col for col in df.columns if col not in ['date', 'net_cash_flow', 'cumulative_cash']]
-        X = df[feature_cols]
-        y = df['net_cash_flow']
+    def _train_ml_models(self, df: pd.DataFrame) -> Tuple[Dict, Dict]:
+        """
+        Train multiple machine learning models on every row, returning (models, scalers)
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        No held-out score is reported (_evaluate_models measures the in-sample
+        fit), so no rows are set aside for one.
+        """
+        # Prepare features (one float32 matrix) and target
+        X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+        y = df['net_cash_flow'].to_numpy(dtype=np.float64)
         
-        # Initialize models
+        # Initialize models; both tree ensembles are LightGBM learners with gain
+        # importances. The forest bags a bootstrap-sized 63.2% of rows per tree,
+        # like the optimizer's RandomForestRegressor; boosting uses every row.
         models = {
-            'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
-            'gradient_boosting': GradientBoostingRegressor(n_estimators=100, random_state=42),
+            'random_forest': lgb.LGBMRegressor(
+                boosting_type='rf', n_estimators=30, max_depth=12, num_leaves=63, min_child_samples=5,
+                subsample=0.632, subsample_freq=1, importance_type='gain', n_jobs=-1, random_state=42, verbose=-1
+            ),
+            'gradient_boosting': lgb.LGBMRegressor(
+                n_estimators=50, max_depth=3, num_leaves=8, learning_rate=0.2,
+                importance_type='gain', n_jobs=-1, random_state=42, verbose=-1
+            ),
             'linear_regression': LinearRegression()
         }
         
-        # Train models
-        for name, model in models.items():
-            if name == 'linear_regression':
-                # Scale features for linear regression
-                scaler = StandardScaler()
-                X_train_scaled = scaler.fit_transform(X_train)
-                X_test_scaled = scaler.transform(X_test)
-                self.scalers[name] = scaler
-                
-                model.fit(X_train_scaled, y_train)
-                y_pred = model.predict(X_test_scaled)
-            else:
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-            
-            # Store model
-            self.models[name] = model
+        # Train models one after another; each LightGBM fit already uses every
+        # core, so running them side by side would only oversubscribe the CPU
+        fitted = [self._fit_model(name, model, X, y) for name, model in models.items()]
+        scalers = {name: scaler for name, scaler in fitted if scaler is not None}
         
-        return self.models
+        return models, scalers
     
-    def _prepare_future_features(self, df: pd.DataFrame, future_dates: pd.DatetimeIndex) -> List[List[float]]:
-        """Prepare features for future dates"""
-        feature_cols = [col for col in df.columns if col not in ['date', 'net_cash_flow', 'cumulative_cash']]
-        
-        future_features = []
-        for date in future_dates:
-            features = []
-            
-            # Time-based features
-            features.extend([
-                date.dayofweek,
-                date.month,
-                date.quarter,
-                date.dayofyear,
-                date.isocalendar().week
-            ])
-            
-            # Lag features (use last known values)
-            for lag in [1, 3, 7, 14, 30]:
-                lag_cols = [f'cash_in_lag_{lag}', f'cash_out_lag_{lag}', f'net_cash_flow_lag_{lag}']
-                for col in lag_cols:
-                    if col in df.columns:
-                        features.append(df[col].iloc[-1])
-                    else:
-                        features.append(0)
-            
-            # Rolling statistics (use last known values)
-            for window in [7, 14, 30]:
-                rolling_cols = [
-                    f'cash_in_ma_{window}', f'cash_out_ma_{window}', 
-                    f'net_cash_flow_ma_{window}', f'net_cash_flow_std_{window}',
-                    f'net_cash_flow_min_{window}', f'net_cash_flow_max_{window}'
-                ]
-                for col in rolling_cols:
-                    if col in df.columns:
-                        features.append(df[col].iloc[-1])
-                    else:
-                        features.append(0)
-            
-            future_features.append(features)
+    @staticmethod
+    def _fit_model(name: str, model, X: np.ndarray, y: np.ndarray) -> Tuple[str, Optional[StandardScaler]]:
+        """Fit one model in place, returning its name and the scaler it was fitted through, if any"""
+        if name == 'linear_regression':
+            # Scale features for linear regression
+            scaler = StandardScaler()
+            model.fit(scaler.fit_transform(X), y)
+            return name, scaler
+        
+        model.fit(X, y)
+        return name, None
+    
+    def _prepare_future_features(self, df: pd.DataFrame, future_dates: pd.DatetimeIndex) -> np.ndarray:
+        """Prepare features for future dates, one float32 row per date in FEATURE_COLUMNS order"""
+        # Amounts, lags and rolling statistics carry their last known values forward
+        features = np.repeat(df[FEATURE_COLUMNS].iloc[-1:].to_numpy(dtype=np.float32), len(future_dates), axis=0)
+        
+        # Time-based features of each future date
+        calendar = {
+            'day_of_week': future_dates.dayofweek,
+            'month': future_dates.month,
+            'quarter': future_dates.quarter,
+            'day_of_year': future_dates.dayofyear,
+            'week_of_year': future_dates.isocalendar()['week']
+        }
+        for col, values in calendar.items():
+            features[:, FEATURE_COLUMNS.index(col)] = np.asarray(values, dtype=np.float32)
         
-        return future_features
+        return features
     
     def _calculate_seasonal_patterns(self, df: pd.DataFrame) -> Dict:
         """Calculate seasonal patterns in cash flow"""
-        df['day_of_year'] = df['date'].dt.dayofyear
-        
-        # Calculate average cash flow by day of year
-        seasonal_patterns = {}
-        for day in range(1, 367):
-            day_data = df[df['day_of_year'] == day]['net_cash_flow']
-            if len(day_data) > 0:
-                seasonal_patterns[day] = day_data.mean()
-        
-        return seasonal_patterns
+        # Average cash flow by day of year, for the days present, in one grouped pass
+        return df['net_cash_flow'].groupby(df['date'].dt.dayofyear).mean().to_dict()
     
-    def _decompose_timeseries(self, series: pd.Series) -> Tuple[List[float], List[float], List[float]]:
-        """Simple time series decomposition"""
-        # Trend (simple linear trend)
-        x = np.arange(len(series))
-        trend_coeffs = np.polyfit(x, series, 1)
-        trend = [trend_coeffs[0] * i + trend_coeffs[1] for i in x]
-        
-        # Seasonal (simple moving average)
-        seasonal = []
-        for i in range(len(series)):
-            if i < 7:
-                seasonal.append(0)
-            else:
-                seasonal.append(series.iloc[i] - trend[i])
-        
-        # Residual
-        residual = [series.iloc[i] - trend[i] - seasonal[i] for i in range(len(series))]
-        
-        return trend, seasonal, residual
+    def _decompose_timeseries(self, series: Union[pd.Series, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Simple time series decomposition into linear trend, seasonal and residual arrays"""
+        return decompose_kernel(np.asarray(series, dtype=np.float64))
     
-    def _evaluate_models(self, df: pd.DataFrame, models: Dict) -> Dict:
+    def _evaluate_models(self, df: pd.DataFrame, models: Dict, scalers: Dict) -> Dict:
         """Evaluate model performance"""
-        feature_cols = [col for col in df.columns if col not in ['date', 'net_cash_flow', 'cumulative_cash']]
-        X = df[feature_cols]
-        y = df['net_cash_flow']
+        X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+        y = df['net_cash_flow'].to_numpy(dtype=np.float64)
         
         performance = {}
         for name, model in models.items():
-            if name in self.scalers:
-                X_scaled = self.scalers[name].transform(X)
+            if name in scalers:
+                X_scaled = scalers[name].transform(X)
                 y_pred = model.predict(X_scaled)
             else:
                 y_pred = model.predict(X)
@@ -443,37 +507,24 @@ class AdvancedProjectionEngine:
     
     def _get_feature_importance(self, df: pd.DataFrame, models: Dict) -> Dict:
         """Get feature importance from models"""
-        feature_cols = [col for col in df.columns if col not in ['date', 'net_cash_flow', 'cumulative_cash']]
-        
         importance = {}
         for name, model in models.items():
             if hasattr(model, 'feature_importances_'):
-                importance[name] = dict(zip(feature_cols, model.feature_importances_))
+                importance[name] = dict(zip(FEATURE_COLUMNS, model.feature_importances_))
             elif hasattr(model, 'coef_'):
-                importance[name] = dict(zip(feature_cols, np.abs(model.coef_)))
+                importance[name] = dict(zip(FEATURE_COLUMNS, np.abs(model.coef_)))
         
         return importance
     
-    def _calculate_variance_reduction(self, projections_list: List[List[Dict]]) -> float:
-        """Calculate variance reduction from ensemble"""
-        if len(projections_list) < 2:
+    def _calculate_variance_reduction(self, flows_list: List[np.ndarray]) -> float:
+        """Calculate variance reduction from ensemble, given each model's projected flows"""
+        if len(flows_list) < 2:
             return 0.0
         
         # Calculate variance of individual models vs ensemble
-        individual_variances = []
-        for projections in projections_list:
-            flows = [p['net_cash_flow'] for p in projections]
-            individual_variances.append(np.var(flows))
-        
-        avg_individual_variance = np.mean(individual_variances)
-        
-        # Calculate ensemble variance
-        ensemble_flows = []
-        for i in range(len(projections_list[0])):
-            ensemble_flow = np.mean([proj[i]['net_cash_flow'] for proj in projections_list])
-            ensemble_flows.append(ensemble_flow)
-        
-        ensemble_variance = np.var(ensemble_flows)
+        flows = np.vstack(flows_list)
+        avg_individual_variance = flows.var(axis=1).mean()
+        ensemble_variance = flows.mean(axis=0).var()
         
         # Variance reduction
         variance_reduction = (avg_individual_variance - ensemble_variance) / avg_individual_variance
@@ -0,0 +1,12 @@
+# Patch the stdlib before anything else imports sockets so blocking I/O yields
+from gevent import monkey
+monkey.patch_all()
+
+# psycopg2 is a C extension and needs its own wait callback to cooperate
+from psycogreen.gevent import patch_psycopg
+patch_psycopg()
+
+from app import app
+
+if __name__ == "__main__":
+    app.run()